@@ -7,12 +7,101 @@ This script manages secrets and generates configuration files for the setup scri
 import json
 import os
 import sys
-import argparse
+
+# Use orjson for JSON encode/decode when available (its C implementation
+# is several times faster than the stdlib); fall back to the stdlib so
+# the script keeps working with no dependencies installed
+try:
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def _dumps_compact(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _loads(data):
+        return json.loads(data)
+
+    def _dumps(obj):
+        return json.dumps(obj, indent=2)
+
+    def _dumps_compact(obj):
+        return json.dumps(obj, separators=(',', ':'))
 
 # Define the path to secrets folder and config directory
 SECRETS_DIR = os.path.expanduser("~/secrets")
+SECRETS_FILE = os.path.join(SECRETS_DIR, "secrets.json")
 CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config")
 
+# Output paths for the generated configuration files
+GIT_CONFIG_FILE = os.path.join(CONFIG_DIR, "03-git-config.json")
+CLAUDE_CONFIG_FILE = os.path.join(CONFIG_DIR, "04-claude-setup.json")
+CREDENTIALS_CONFIG_FILE = os.path.join(CONFIG_DIR, "06-lx-credentials.json")
+
+# Secrets that must be present for the setup scripts to work
+REQUIRED_SECRETS = (
+    "github_username",
+    "github_email",
+    "github_token",
+    "anthropic_api_key"
+)
+
+# In-process cache of the parsed secrets file, invalidated by mtime
+_SECRETS_CACHE = None
+_SECRETS_MTIME = None
+
+def _get_secrets():
+    """
+    Return the parsed secrets dict, using an in-process cache.
+    The cache is invalidated when the file's mtime changes, so
+    repeated lookups in a single run only read the file once.
+    Returns an empty dict if the file is missing or invalid.
+    """
+    global _SECRETS_CACHE, _SECRETS_MTIME
+
+    # Stat once for the mtime check; a missing file is the common
+    # "no secrets yet" case rather than an error
+    try:
+        mtime = os.stat(SECRETS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        print(f"Secrets file not found at {SECRETS_FILE}, using default values")
+        return {}
+
+    # Reuse the cached dict if the file hasn't changed on disk
+    if _SECRETS_CACHE is not None and mtime == _SECRETS_MTIME:
+        return _SECRETS_CACHE
+
+    try:
+        # Load the JSON file
+        with open(SECRETS_FILE, 'r') as f:
+            secrets = _loads(f.read())
+    except FileNotFoundError:
+        # File removed between the stat and the open
+        return {}
+    except json.JSONDecodeError:
+        print(f"Error: secrets file is not valid JSON")
+        return {}
+    except Exception as e:
+        print(f"Error loading secrets file: {e}")
+        return {}
+
+    _SECRETS_CACHE = secrets
+    _SECRETS_MTIME = mtime
+    return secrets
+
+def _invalidate_secrets_cache():
+    """
+    Drop the cached secrets dict so the next lookup re-reads the file.
+    Called after any write to the secrets file.
+    """
+    global _SECRETS_CACHE, _SECRETS_MTIME
+    _SECRETS_CACHE = None
+    _SECRETS_MTIME = None
+
 def ensure_secrets_file():
     """
     Ensure the centralized secrets file exists.
@@ -20,23 +109,27 @@ def ensure_secrets_file():
     Sets proper permissions (600) for security.
     Returns the path to the secrets file.
     """
-    # Path to the centralized secrets file
-    secrets_file = os.path.join(SECRETS_DIR, "secrets.json")
-    
+    # Common case: the file is already there, so one stat is all the
+    # work this function needs to do
+    if os.path.exists(SECRETS_FILE):
+        return SECRETS_FILE
+
     # Create the secrets directory if it doesn't exist
     os.makedirs(SECRETS_DIR, exist_ok=True)
-    
-    # Check if the secrets file exists
-    if not os.path.exists(secrets_file):
-        print(f"Creating new secrets file at {secrets_file}")
-        # Create an empty secrets file
-        with open(secrets_file, 'w') as f:
-            json.dump({}, f, indent=2)
-        
+
+    # Create the secrets file atomically; 'x' mode fails if it
+    # already exists, avoiding a separate existence check
+    try:
+        with open(SECRETS_FILE, 'x') as f:
+            print(f"Creating new secrets file at {SECRETS_FILE}")
+            f.write(_dumps_compact({}))
+
         # Set appropriate permissions (readable only by the owner)
-        os.chmod(secrets_file, 0o600)
-        
-    return secrets_file
+        os.chmod(SECRETS_FILE, 0o600)
+    except FileExistsError:
+        pass
+
+    return SECRETS_FILE
 
 def load_secret(secret_name, default_value=""):
     """
@@ -44,74 +137,75 @@ def load_secret(secret_name, default_value=""):
     Falls back to default value if the secret doesn't exist.
     Handles various error conditions gracefully.
     """
-    # Path to the centralized secrets file
-    secrets_file = os.path.join(SECRETS_DIR, "secrets.json")
-    
-    # Check if the secrets file exists
-    if os.path.exists(secrets_file):
-        try:
-            # Load the JSON file
-            with open(secrets_file, 'r') as f:
-                secrets = json.load(f)
-            
-            # Return the secret if it exists in the file
-            if secret_name in secrets:
-                return secrets[secret_name]
-            else:
-                print(f"Secret {secret_name} not found in secrets file, using default value")
-                return default_value
-        except json.JSONDecodeError:
-            print(f"Error: secrets file is not valid JSON")
-            return default_value
-        except Exception as e:
-            print(f"Error loading secrets file: {e}")
-            return default_value
+    # Look up the secret in the cached dict
+    secrets = _get_secrets()
+
+    # Return the secret if it exists in the file
+    if secret_name in secrets:
+        return secrets[secret_name]
     else:
-        print(f"Secrets file not found at {secrets_file}, using default value")
+        print(f"Secret {secret_name} not found in secrets file, using default value")
         return default_value
 
-def update_secret(secret_name, secret_value):
+def update_secrets_bulk(new_secrets):
     """
-    Update or add a secret in the centralized secrets.json file.
+    Update or add multiple secrets in the centralized secrets.json file
+    with a single read and a single write.
     Creates the file if it doesn't exist.
     Preserves existing secrets when updating.
     """
     # Ensure the secrets file exists
-    secrets_file = ensure_secrets_file()
-    
+    ensure_secrets_file()
+
     # Load current secrets
     try:
-        with open(secrets_file, 'r') as f:
-            secrets = json.load(f)
-    except json.JSONDecodeError:
-        # If the file is not valid JSON, start with an empty dict
+        with open(SECRETS_FILE, 'r') as f:
+            secrets = _loads(f.read())
+    except (FileNotFoundError, json.JSONDecodeError):
+        # If the file is missing or not valid JSON, start with an empty dict
         secrets = {}
-    
-    # Update the secret
-    secrets[secret_name] = secret_value
-    
-    # Write back to the file
-    with open(secrets_file, 'w') as f:
-        json.dump(secrets, f, indent=2)
-    
-    print(f"Updated secret: {secret_name}")
 
-def create_git_config():
+    # Merge in the new values
+    secrets.update(new_secrets)
+
+    # Write to a temp file and atomically swap it in so an interrupted
+    # write can't destroy the existing secrets; creating the temp file
+    # with mode 600 keeps the owner-only permissions without a
+    # follow-up chmod
+    tmp_file = SECRETS_FILE + ".tmp"
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(_dumps_compact(secrets))
+    os.replace(tmp_file, SECRETS_FILE)
+
+    # Drop the cache so the next read picks up the new values
+    _invalidate_secrets_cache()
+
+    for secret_name in new_secrets:
+        print(f"Updated secret: {secret_name}")
+
+def update_secret(secret_name, secret_value):
+    """
+    Update or add a single secret in the centralized secrets.json file.
+    Thin wrapper around update_secrets_bulk.
+    """
+    update_secrets_bulk({secret_name: secret_value})
+
+def create_git_config(secrets=None):
     """
     Create the Git configuration JSON file.
     Pulls sensitive values from the centralized secrets file.
     Non-sensitive values are set as constants.
     """
-    output_file = os.path.join(CONFIG_DIR, "03-git-config.json")
-    
-    # Create config directory if it doesn't exist
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    
+    # Load the secrets dict once unless the caller already has it
+    if secrets is None:
+        secrets = _get_secrets()
+
     # Define the configuration with sensitive data from secrets
     config = {
-        "git_user_name": load_secret("github_username"),
-        "git_user_email": load_secret("github_email"),
-        "github_token": load_secret("github_token"),
+        "git_user_name": secrets.get("github_username", ""),
+        "git_user_email": secrets.get("github_email", ""),
+        "github_token": secrets.get("github_token", ""),
         "generate_ssh_key": True,
         "ssh_key_type": "ed25519",
         "git_default_branch": "main",
@@ -121,22 +215,21 @@ def create_git_config():
     }
     
     # Write the configuration to the output file
-    with open(output_file, 'w') as f:
-        json.dump(config, f, indent=2)
+    with open(GIT_CONFIG_FILE, 'w') as f:
+        f.write(_dumps(config))
     
-    print(f"Created Git configuration file at {output_file}")
+    print(f"Created Git configuration file at {GIT_CONFIG_FILE}")
 
-def create_claude_config():
+def create_claude_config(secrets=None):
     """
     Create the Claude Code configuration JSON file.
     Pulls sensitive values from the centralized secrets file.
     Non-sensitive values are set as constants.
     """
-    output_file = os.path.join(CONFIG_DIR, "04-claude-setup.json")
-    
-    # Create config directory if it doesn't exist
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    
+    # Load the secrets dict once unless the caller already has it
+    if secrets is None:
+        secrets = _get_secrets()
+
     # Define the configuration
     config = {
         "installation_method": "npm",
@@ -147,65 +240,53 @@ def create_claude_config():
         "log_level": "info",
         "setup_aliases": "true",
         "create_project_templates": "true",
-        "anthropic_api_key": load_secret("anthropic_api_key")
+        "anthropic_api_key": secrets.get("anthropic_api_key", "")
     }
     
     # Write the configuration to the output file
-    with open(output_file, 'w') as f:
-        json.dump(config, f, indent=2)
+    with open(CLAUDE_CONFIG_FILE, 'w') as f:
+        f.write(_dumps(config))
     
-    print(f"Created Claude configuration file at {output_file}")
+    print(f"Created Claude configuration file at {CLAUDE_CONFIG_FILE}")
 
-def create_credentials_config():
+def create_credentials_config(secrets=None):
     """
     Create the credentials configuration JSON file.
     Pulls sensitive values from the centralized secrets file.
     Non-sensitive values are set as constants.
     """
-    output_file = os.path.join(CONFIG_DIR, "06-lx-credentials.json")
-    
-    # Create config directory if it doesn't exist
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    
+    # Load the secrets dict once unless the caller already has it
+    if secrets is None:
+        secrets = _get_secrets()
+
     # Define the configuration with sensitive data from secrets
     config = {
-        "github_username": load_secret("github_username"),
-        "github_email": load_secret("github_email"),
-        "github_token": load_secret("github_token"),
-        "openai_api_key": load_secret("openai_api_key"),
-        "anthropic_api_key": load_secret("anthropic_api_key"),
+        "github_username": secrets.get("github_username", ""),
+        "github_email": secrets.get("github_email", ""),
+        "github_token": secrets.get("github_token", ""),
+        "openai_api_key": secrets.get("openai_api_key", ""),
+        "anthropic_api_key": secrets.get("anthropic_api_key", ""),
         "credential_file_location": "${HOME}/.config/claude-code/credentials",
         "add_to_bashrc": True,
         "encrypt_credentials": False,
-        "wsl_distro_name": load_secret("wsl_distro_name", "Ubuntu")
+        "wsl_distro_name": secrets.get("wsl_distro_name", "Ubuntu")
     }
     
     # Write the configuration to the output file
-    with open(output_file, 'w') as f:
-        json.dump(config, f, indent=2)
+    with open(CREDENTIALS_CONFIG_FILE, 'w') as f:
+        f.write(_dumps(config))
     
-    print(f"Created credentials configuration file at {output_file}")
+    print(f"Created credentials configuration file at {CREDENTIALS_CONFIG_FILE}")
 
 def check_required_secrets():
     """
     Check if all required secrets are available.
     Returns a list of missing secrets.
     """
-    # List of required secrets
-    required_secrets = [
-        "github_username", 
-        "github_email", 
-        "github_token",
-        "anthropic_api_key"
-    ]
-    
-    # Check for missing secrets
-    missing_secrets = []
-    for secret in required_secrets:
-        if not load_secret(secret):  # Empty string is falsy
-            missing_secrets.append(secret)
-    
-    return missing_secrets
+    # Load the secrets dict once and check every key against it
+    # (empty string counts as missing)
+    secrets = _get_secrets()
+    return [s for s in REQUIRED_SECRETS if not secrets.get(s)]
 
 def interactive_setup():
     """
@@ -226,9 +307,11 @@ def interactive_setup():
         # Ask if the user wants to input the secrets now
         create_now = input("Would you like to input these secrets now? (y/n): ")
         if create_now.lower() in ['y', 'yes']:
+            # Collect all the answers first, then write the file once
+            answers = {}
             for secret in missing_secrets:
-                value = input(f"Enter value for {secret}: ")
-                update_secret(secret, value)
+                answers[secret] = input(f"Enter value for {secret}: ")
+            update_secrets_bulk(answers)
     else:
         print("All required secrets are available")
 
@@ -236,6 +319,9 @@ def main():
     """
     Main function to parse arguments and run the appropriate actions.
     """
+    # Imported here so trivial invocations (e.g. --help) don't pay for it
+    import argparse
+
     parser = argparse.ArgumentParser(description='Generate configuration files for WSL Claude Code environment')
     parser.add_argument('--all', action='store_true', help='Generate all configuration files')
     parser.add_argument('--git', action='store_true', help='Generate Git configuration')
@@ -245,11 +331,15 @@ def main():
     parser.add_argument('--update-secret', nargs=2, metavar=('NAME', 'VALUE'), help='Update a secret')
     
     args = parser.parse_args()
-    
-    # Make sure the secrets file exists
-    ensure_secrets_file()
-    
-    # Handle updating a secret
+
+    # If no action was requested, show help and exit before doing any
+    # filesystem work at all
+    if not (args.all or args.git or args.claude or args.creds or args.interactive or args.update_secret):
+        parser.print_help()
+        return
+
+    # Handle updating a secret; update_secret creates the secrets
+    # file itself, so read-only paths never touch ~/secrets
     if args.update_secret:
         update_secret(args.update_secret[0], args.update_secret[1])
     
@@ -257,19 +347,20 @@ def main():
     if args.interactive:
         interactive_setup()
     
+    # Take a single secrets snapshot and share it across the writers
+    if args.all or args.git or args.claude or args.creds:
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        secrets = _get_secrets()
+
     # Generate configurations
     if args.all or args.git:
-        create_git_config()
-    
+        create_git_config(secrets)
+
     if args.all or args.claude:
-        create_claude_config()
-    
+        create_claude_config(secrets)
+
     if args.all or args.creds:
-        create_credentials_config()
-    
-    # If no generation options specified, show help
-    if not (args.all or args.git or args.claude or args.creds or args.interactive or args.update_secret):
-        parser.print_help()
+        create_credentials_config(secrets)
 
 if __name__ == "__main__":
     main()